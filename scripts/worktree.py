@@ -3,7 +3,7 @@
 Git Worktree Manager with iTerm2 Integration
 
 Manages git worktrees with automatic iTerm2 tab/window creation.
-Provides create, close, list, switch, and open operations.
+Provides create, create-many, close, list, switch, and open operations.
 """
 
 import subprocess
@@ -11,179 +11,603 @@ import sys
 import json
 import os
 import argparse
+import asyncio
+import difflib
+import functools
+import shlex
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 
-def run_git(*args, cwd=None, check=True):
-    """Run a git command and return output."""
+# `git worktree list --porcelain` line prefixes and the keys they map to
+WORKTREE_FIELDS = (("worktree ", "path"), ("HEAD ", "head"))
+BRANCH_PREFIX = "branch refs/heads/"
+WORKTREE_FLAGS = frozenset(("bare", "detached"))
+
+# Minimal environment for read-only git queries: a large inherited shell
+# env slows every fork, and these only need the variables below plus
+# git's own GIT_*. They skip optional locks (e.g. the index refresh in
+# `status`), so they neither wait on nor block a concurrent gc/fsck, and
+# never prompt for credentials. Writes such as `worktree add` inherit the
+# full environment, since checkout hooks and filters (e.g. git-lfs) may
+# need SSH agents, proxies or the user's own variables.
+GIT_ENV_KEYS = (
+    "PATH", "HOME", "USER", "TMPDIR", "XDG_CONFIG_HOME",
+    "LANG", "LC_ALL", "LC_CTYPE", "LC_MESSAGES",
+)
+READ_ONLY_GIT_COMMANDS = frozenset(("status", "rev-parse", "for-each-ref"))
+READ_ONLY_GIT_ENV = {
+    key: value for key, value in os.environ.items()
+    if key in GIT_ENV_KEYS or key.startswith("GIT_")
+}
+READ_ONLY_GIT_ENV["GIT_OPTIONAL_LOCKS"] = "0"
+READ_ONLY_GIT_ENV["GIT_TERMINAL_PROMPT"] = "0"
+
+# AppleScript statements (inside `tell application "iTerm2"`) that open a
+# session per --open-mode; {command} is an AppleScript string literal
+OPEN_SESSION_SCRIPTS = {
+    "new_window": '''
+    create window with default profile
+    tell current session of current window
+        write text {command}
+    end tell
+''',
+    "new_pane_right": '''
+    tell current session of current window
+        set newSession to (split vertically with default profile)
+        tell newSession
+            write text {command}
+        end tell
+    end tell
+''',
+    "new_pane_below": '''
+    tell current session of current window
+        set newSession to (split horizontally with default profile)
+        tell newSession
+            write text {command}
+        end tell
+    end tell
+''',
+    "new_tab": '''
+    tell current window
+        create tab with default profile
+        tell current session
+            write text {command}
+        end tell
+    end tell
+''',
+}
+
+# Cached `git worktree list` results, keyed by the repository's .git directory
+WORKTREE_INDEX_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "iterm-worktree", "index.json"
+)
+
+
+def run_git(*args, cwd=None, check=True, stderr=subprocess.PIPE, env=None):
+    """Run a git command and return output.
+
+    Callers that never read stderr pass `stderr=subprocess.DEVNULL` to skip
+    capturing and decoding it. `env` replaces the environment for a single
+    call, e.g. to read git's messages untranslated.
+    """
+    read_only = args[0] in READ_ONLY_GIT_COMMANDS or args[:2] == ("worktree", "list")
+    if env is None and read_only:
+        env = READ_ONLY_GIT_ENV
     result = subprocess.run(
         ["git"] + list(args),
-        capture_output=True,
+        stdout=subprocess.PIPE,
+        stderr=stderr,
         text=True,
-        cwd=cwd
+        cwd=cwd,
+        env=env
     )
     if check and result.returncode != 0:
-        raise RuntimeError(f"Git error: {result.stderr.strip()}")
+        raise RuntimeError(f"Git error: {(result.stderr or '').strip()}")
     return result
 
 
-def get_repo_root(cwd=None):
-    """Get the root directory of the git repository."""
-    result = run_git("rev-parse", "--show-toplevel", cwd=cwd)
-    return result.stdout.strip()
+def cached_by_cwd(func):
+    """Memoize a repository query per working directory.
+
+    The CLI runs a single short-lived command per process, so repository
+    state is treated as immutable while it runs. `cwd=None` is resolved to
+    the current directory so it shares a cache entry with an explicit path.
+    Call `.cache_clear()` on the wrapped function to force a re-query.
+    """
+    cached = functools.lru_cache(maxsize=None)(func)
+
+    @functools.wraps(func)
+    def wrapper(cwd=None):
+        return cached(cwd or os.getcwd())
+
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+def find_git_common_dir(cwd):
+    """Find the shared .git directory for `cwd` without running git.
+
+    Returns None when it can't be determined from the filesystem alone
+    (bare repositories, or GIT_DIR set in the environment).
+    """
+    if "GIT_DIR" in os.environ:
+        return None
+
+    path = os.path.abspath(cwd)
+    while True:
+        # Inside a bare repository or a .git directory; let git decide
+        if (os.path.isfile(os.path.join(path, "HEAD"))
+                and os.path.isdir(os.path.join(path, "objects"))
+                and os.path.isdir(os.path.join(path, "refs"))):
+            return None
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            # Linked worktree ("<common>/worktrees/<name>") or submodule
+            # ("<super>/.git/modules/<name>", itself the common dir)
+            try:
+                with open(dot_git) as f:
+                    content = f.read().strip()
+            except OSError:
+                return None
+            if not content.startswith("gitdir: "):
+                return None
+            gitdir = os.path.normpath(os.path.join(path, content[len("gitdir: "):]))
+            try:
+                with open(os.path.join(gitdir, "commondir")) as f:
+                    return os.path.normpath(os.path.join(gitdir, f.read().strip()))
+            except OSError:
+                pass
+            if os.path.basename(os.path.dirname(gitdir)) == "worktrees":
+                return os.path.dirname(os.path.dirname(gitdir))
+            return gitdir
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def worktree_signature(common_dir, worktrees):
+    """Stat the files `git worktree list` output depends on.
+
+    Covers the worktree admin directory, each worktree's HEAD and gitdir,
+    and the refs of the listed branches, so adding, removing or moving a
+    worktree, switching its branch, or committing invalidates the index.
+    """
+    admin_dir = os.path.join(common_dir, "worktrees")
+    paths = [
+        os.path.join(common_dir, "HEAD"),
+        os.path.join(common_dir, "packed-refs"),
+        admin_dir,
+    ]
+    try:
+        for name in sorted(os.listdir(admin_dir)):
+            paths.append(os.path.join(admin_dir, name, "HEAD"))
+            paths.append(os.path.join(admin_dir, name, "gitdir"))
+    except OSError:
+        pass
+    for wt in worktrees:
+        if "branch" in wt:
+            paths.append(os.path.join(common_dir, "refs", "heads", wt["branch"]))
 
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append([path, st.st_mtime_ns, st.st_size])
+        except OSError:
+            signature.append([path, None, None])
+    return signature
+
+
+def load_worktree_index():
+    """Read the on-disk worktree index, or an empty one."""
+    try:
+        with open(WORKTREE_INDEX_PATH) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+
+def save_worktree_index(index):
+    """Atomically rewrite the on-disk worktree index, ignoring write errors."""
+    try:
+        os.makedirs(os.path.dirname(WORKTREE_INDEX_PATH), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(WORKTREE_INDEX_PATH))
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, WORKTREE_INDEX_PATH)
+    except OSError:
+        pass
 
+
+@cached_by_cwd
 def get_worktrees(cwd=None):
-    """List all worktrees in the repository."""
+    """List all worktrees in the repository.
+
+    Served from the on-disk index when the repository's worktree metadata
+    is unchanged since it was written; otherwise git is run and the index
+    is refreshed.
+    """
+    common_dir = find_git_common_dir(cwd)
+    if common_dir:
+        index = load_worktree_index()
+        entry = index.get(common_dir)
+        # A malformed entry is treated as a cache miss and overwritten below
+        worktrees = entry.get("worktrees") if isinstance(entry, dict) else None
+        if (isinstance(worktrees, list)
+                and all(isinstance(wt, dict) for wt in worktrees)
+                and entry.get("signature") == worktree_signature(common_dir, worktrees)):
+            return worktrees
+
     result = run_git("worktree", "list", "--porcelain", cwd=cwd)
     worktrees = []
     current = {}
 
-    for line in result.stdout.strip().split("\n"):
+    # Entries are separated by blank lines, so no strip() is needed
+    for line in result.stdout.split("\n"):
         if not line:
             if current:
                 worktrees.append(current)
                 current = {}
             continue
 
-        if line.startswith("worktree "):
-            current["path"] = line[9:]
-        elif line.startswith("HEAD "):
-            current["head"] = line[5:]
-        elif line.startswith("branch "):
-            current["branch"] = line[7:].replace("refs/heads/", "")
-        elif line == "bare":
-            current["bare"] = True
-        elif line == "detached":
-            current["detached"] = True
+        for prefix, key in WORKTREE_FIELDS:
+            if line[:len(prefix)] == prefix:
+                current[key] = line[len(prefix):]
+                break
+        else:
+            if line[:len(BRANCH_PREFIX)] == BRANCH_PREFIX:
+                current["branch"] = line[len(BRANCH_PREFIX):]
+            elif line[:7] == "branch ":
+                current["branch"] = line[7:]
+            elif line in WORKTREE_FLAGS:
+                current[line] = True
 
     if current:
         worktrees.append(current)
 
+    if common_dir:
+        index[common_dir] = {
+            "signature": worktree_signature(common_dir, worktrees),
+            "worktrees": worktrees,
+        }
+        save_worktree_index(index)
+
     return worktrees
 
 
-def branch_exists(branch_name, cwd=None):
-    """Check if a branch already exists."""
-    result = run_git("branch", "--list", branch_name, cwd=cwd, check=False)
-    return bool(result.stdout.strip())
+def find_worktree(worktrees, search):
+    """Find a worktree by branch name, full path, or trailing path component(s)."""
+    by_branch = {}
+    by_path = {}
+    by_basename = {}
+    # Reverse so the first matching worktree wins, as with a linear scan
+    for wt in reversed(worktrees):
+        path = wt.get("path", "")
+        if "branch" in wt:
+            by_branch[wt["branch"]] = wt
+        by_path[path] = wt
+        by_basename[os.path.basename(path)] = wt
+
+    target = by_branch.get(search) or by_path.get(search) or by_basename.get(search)
+    if target is None and "/" in search:
+        suffix = f"/{search}"
+        target = next((wt for wt in worktrees if wt.get("path", "").endswith(suffix)), None)
+    return target
+
+
+def find_closest_worktree(worktrees, search):
+    """Find the worktree whose branch name best matches a mistyped `search`.
+
+    Uses rapidfuzz when installed, otherwise difflib. Both score with the
+    plain edit ratio, so partial matches (e.g. `feat` against every
+    `feature-*` branch) don't pass. Returns None if no branch is similar
+    enough.
+    """
+    by_branch = {wt["branch"]: wt for wt in worktrees if wt.get("branch")}
+
+    try:
+        # Imported here so other commands don't pay for it
+        from rapidfuzz import fuzz, process
+    except ImportError:
+        process = None
+
+    if process is not None:
+        match = process.extractOne(search, list(by_branch), scorer=fuzz.ratio, score_cutoff=80)
+        name = match[0] if match else None
+    else:
+        matches = difflib.get_close_matches(search, list(by_branch), n=1, cutoff=0.8)
+        name = matches[0] if matches else None
+
+    return by_branch.get(name)
+
+
+@cached_by_cwd
+def gather_repo_info(cwd=None):
+    """Get the repository root and current branch from one `rev-parse` call."""
+    result = run_git("rev-parse", "--show-toplevel", "--abbrev-ref", "HEAD",
+                     cwd=cwd, check=False, stderr=subprocess.DEVNULL)
+    lines = result.stdout.split("\n")
+    if result.returncode == 0 and len(lines) >= 2:
+        repo_root, current_branch = lines[0], lines[1]
+    else:
+        # Unborn HEAD (no commits yet): the root is still resolvable
+        repo_root = run_git("rev-parse", "--show-toplevel", cwd=cwd).stdout.strip()
+        current_branch = None
+
+    return {
+        "root": repo_root,
+        "current_branch": current_branch,
+    }
+
+
+def get_repo_root(cwd=None, known_root=None):
+    """Get the root directory of the git repository.
 
+    Trusts `known_root` (from --repo-root) or WTM_REPO_ROOT (e.g. exported
+    by a shell prompt hook) when the working directory is inside it,
+    skipping the git call entirely.
+    """
+    repo_root = known_root or os.environ.get("WTM_REPO_ROOT")
+    if repo_root:
+        repo_root = os.path.abspath(repo_root)
+        current = os.path.abspath(cwd or os.getcwd())
+        if current == repo_root or current.startswith(repo_root + os.sep):
+            return repo_root
+    return gather_repo_info(cwd)["root"]
 
+
+@cached_by_cwd
 def get_default_branch(cwd=None):
-    """Get the default branch name (main or master)."""
-    result = run_git("symbolic-ref", "refs/remotes/origin/HEAD", cwd=cwd, check=False)
-    if result.returncode == 0:
-        return result.stdout.strip().replace("refs/remotes/origin/", "")
-
-    # Fallback to checking common names
-    for branch in ["main", "master"]:
-        if branch_exists(branch, cwd=cwd):
-            return branch
+    """Get the default branch name (origin/HEAD, then main or master).
+
+    All three candidates are resolved by one `for-each-ref` call.
+    """
+    result = run_git(
+        "for-each-ref", "--format=%(refname) %(symref)",
+        "refs/remotes/origin/HEAD", "refs/heads/main", "refs/heads/master",
+        cwd=cwd, check=False, stderr=subprocess.DEVNULL
+    )
+    refs = {}
+    for line in result.stdout.split("\n"):
+        if line:
+            refname, _, symref = line.partition(" ")
+            refs[refname] = symref
+
+    origin_head = refs.get("refs/remotes/origin/HEAD")
+    if origin_head:
+        return origin_head.replace("refs/remotes/origin/", "")
+    if "refs/heads/main" in refs:
+        return "main"
+    if "refs/heads/master" in refs:
+        return "master"
     return "main"
 
 
-def get_current_branch(cwd=None):
-    """Get the current branch name."""
-    result = run_git("rev-parse", "--abbrev-ref", "HEAD", cwd=cwd, check=False)
-    if result.returncode == 0:
-        return result.stdout.strip()
-    return None
+def get_worktree_state(worktree_path):
+    """Get (dirty, ahead) for a worktree from a single `git status` call.
 
+    `dirty` is True if there are uncommitted changes; `ahead` is the number
+    of commits not pushed to the upstream (0 if no upstream is set).
+    """
+    result = run_git("status", "--porcelain=v2", "--branch",
+                     cwd=worktree_path, check=False, stderr=subprocess.DEVNULL)
+    dirty = False
+    ahead = 0
 
-def has_uncommitted_changes(worktree_path):
-    """Check if worktree has uncommitted changes."""
-    result = run_git("status", "--porcelain", cwd=worktree_path, check=False)
-    return bool(result.stdout.strip())
+    for line in result.stdout.split("\n"):
+        if not line:
+            continue
+        if line.startswith("# branch.ab "):
+            ahead = int(line.split()[2][1:])
+        elif not line.startswith("#"):
+            dirty = True
 
+    return dirty, ahead
 
-def has_unpushed_commits(worktree_path):
-    """Check if worktree has unpushed commits."""
-    result = run_git("log", "@{u}..", "--oneline", cwd=worktree_path, check=False)
-    if result.returncode != 0:
-        # No upstream set, check if there are any commits
-        return False
-    return bool(result.stdout.strip())
 
+def quote_applescript(text):
+    """Quote a string as an AppleScript string literal."""
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
 
-def automate_iterm(worktree_path, open_mode="new_tab", run_claude=False, task_description=None):
-    """Open worktree in iTerm2 using AppleScript."""
 
-    # Build the command to run in iTerm
-    cd_cmd = f'cd "{worktree_path}"'
+def write_session_script(worktree_path, run_claude=False, task_description=None):
+    """Write the command for a new iTerm2 session to a temporary script.
+
+    The script deletes itself when sourced, so iTerm2 only has to type a
+    short fixed `source <path>` line and no shell text is escaped into the
+    AppleScript. Returns the script path.
+    """
+    fd, script_path = tempfile.mkstemp(prefix="worktree-", suffix=".sh")
+    os.chmod(script_path, 0o700)
 
+    full_cmd = f"cd {shlex.quote(worktree_path)}"
     if run_claude and task_description:
-        # Escape quotes in task description for shell
-        escaped_task = task_description.replace('"', '\\"').replace("'", "'\\''")
-        full_cmd = f'{cd_cmd} && claude --allowedTools "Bash,Read,Write,Edit,Glob,Grep,WebFetch,WebSearch" "{escaped_task}"'
-    else:
-        full_cmd = cd_cmd
+        full_cmd += f" && claude --allowedTools Bash,Read,Write,Edit,Glob,Grep,WebFetch,WebSearch {shlex.quote(task_description)}"
 
-    # Escape double quotes for AppleScript embedding
-    full_cmd_escaped = full_cmd.replace('\\', '\\\\').replace('"', '\\"')
+    with os.fdopen(fd, "w") as f:
+        f.write(f"rm -f -- {shlex.quote(script_path)}\n{full_cmd}\n")
 
-    applescript = ""
+    return script_path
 
-    if open_mode == "new_window":
-        applescript = f'''
-tell application "iTerm2"
-    create window with default profile
-    tell current session of current window
-        write text "{full_cmd_escaped}"
-    end tell
-    activate
-end tell
-'''
-    elif open_mode == "new_pane_right":
-        applescript = f'''
-tell application "iTerm2"
-    tell current session of current window
-        set newSession to (split vertically with default profile)
-        tell newSession
-            write text "{full_cmd_escaped}"
-        end tell
-    end tell
-    activate
-end tell
-'''
-    elif open_mode == "new_pane_below":
-        applescript = f'''
-tell application "iTerm2"
-    tell current session of current window
-        set newSession to (split horizontally with default profile)
-        tell newSession
-            write text "{full_cmd_escaped}"
-        end tell
-    end tell
-    activate
-end tell
-'''
+
+def remove_session_script(script_path):
+    """Delete a session script that iTerm2 never ran."""
+    try:
+        os.unlink(script_path)
+    except OSError:
+        pass
+
+
+def build_session_command(script_path):
+    """Build the AppleScript literal that sources a session script."""
+    return quote_applescript(f"source {shlex.quote(script_path)}")
+
+
+def build_open_script(open_mode, command):
+    """Build the AppleScript statements (inside `tell application "iTerm2"`) that open a session."""
+    template = OPEN_SESSION_SCRIPTS.get(open_mode, OPEN_SESSION_SCRIPTS["new_tab"])
+    return template.format(command=command)
+
+
+def run_osascript(applescript, stderr=subprocess.PIPE):
+    """Run an AppleScript, passing it on stdin rather than in argv."""
+    return subprocess.run(
+        ["osascript", "-"],
+        input=applescript,
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+        text=True
+    )
+
+
+# Returned by run_iterm_api when the iTerm2 Python API can't be used
+API_UNAVAILABLE = object()
+
+
+@functools.lru_cache(maxsize=None)
+def load_iterm2():
+    """Import the optional iterm2 package on first use, or return None.
+
+    Deferred so commands that never talk to iTerm2 don't pay for it.
+    """
+    try:
+        import iterm2
+    except ImportError:
+        return None
+    return iterm2
+
+
+def use_iterm_api():
+    """Whether to try the iTerm2 Python API before falling back to osascript."""
+    return not os.environ.get("WTM_NO_ITERM_API") and load_iterm2() is not None
+
+
+def run_iterm_api(func, *args):
+    """Run `func(connection, app, *args)` over one iTerm2 API connection.
+
+    Returns API_UNAVAILABLE if the API server can't be reached, so callers
+    can fall back to AppleScript. Errors after connecting propagate, since
+    the call may already have opened a session.
+    """
+    iterm2 = load_iterm2()
+
+    async def main():
+        connection = None
+        try:
+            try:
+                connection = await iterm2.Connection.async_create()
+                app = await iterm2.async_get_app(connection)
+            except Exception:
+                return API_UNAVAILABLE
+            return await func(connection, app, *args)
+        finally:
+            websocket = getattr(connection, "websocket", None)
+            if websocket is not None:
+                await websocket.close()
+
+    # A fresh loop, since get_iterm_tabs may run in a worker thread
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        # Cancel the connection's dispatch task so the loop closes cleanly
+        all_tasks = getattr(asyncio, "all_tasks", None) or asyncio.Task.all_tasks
+        pending = [task for task in all_tasks(loop) if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+
+
+async def api_get_tabs(connection, app):
+    """List sessions and their working directories via the iTerm2 API."""
+    tabs = []
+    for window in app.terminal_windows:
+        for tab in window.tabs:
+            for session in tab.sessions:
+                path = await session.async_get_variable("path")
+                if path:
+                    tabs.append({"window_id": window.window_id, "path": path})
+    return tabs
+
+
+async def api_open_session(connection, app, open_mode, command):
+    """Open a session via the iTerm2 API and type `command` into it."""
+    window = app.current_terminal_window
+    if open_mode == "new_window" or window is None:
+        window = await load_iterm2().Window.async_create(connection)
+        session = window.current_tab.current_session
+    elif open_mode in ("new_pane_right", "new_pane_below"):
+        session = await window.current_tab.current_session.async_split_pane(
+            vertical=open_mode == "new_pane_right"
+        )
     else:  # new_tab (default)
-        applescript = f'''
-tell application "iTerm2"
-    tell current window
-        create tab with default profile
-        tell current session
-            write text "{full_cmd_escaped}"
-        end tell
-    end tell
-    activate
+        tab = await window.async_create_tab()
+        session = tab.current_session
+
+    await session.async_send_text(command + "\n")
+    await app.async_activate()
+
+
+async def api_switch_to_tab(connection, app, path, open_mode, command):
+    """Select the session in `path` via the iTerm2 API, else open one if `open_mode`."""
+    for window in app.terminal_windows:
+        for tab in window.tabs:
+            for session in tab.sessions:
+                if await session.async_get_variable("path") == path:
+                    await tab.async_select()
+                    await window.async_activate()
+                    await app.async_activate()
+                    return True
+
+    if open_mode:
+        await api_open_session(connection, app, open_mode, command)
+    return False
+
+
+def automate_iterm(worktree_path, open_mode="new_tab", run_claude=False, task_description=None):
+    """Open worktree in iTerm2 using the Python API, or AppleScript as a fallback."""
+    script_path = write_session_script(worktree_path, run_claude, task_description)
+
+    if use_iterm_api():
+        command = f"source {shlex.quote(script_path)}"
+        if run_iterm_api(api_open_session, open_mode, command) is not API_UNAVAILABLE:
+            return True
+
+    applescript = f'''
+tell application "iTerm2"{build_open_script(open_mode, build_session_command(script_path))}    activate
 end tell
 '''
 
-    result = subprocess.run(
-        ["osascript", "-e", applescript],
-        capture_output=True,
-        text=True
-    )
+    result = run_osascript(applescript)
 
     if result.returncode != 0:
+        remove_session_script(script_path)
         raise RuntimeError(f"iTerm2 automation failed: {result.stderr}")
 
     return True
 
 
+@functools.lru_cache(maxsize=None)
 def get_iterm_tabs():
-    """Get all iTerm2 tabs with their working directories."""
+    """Get all iTerm2 tabs with their working directories.
+
+    Cached for the lifetime of the process, like the git queries above.
+    """
+    if use_iterm_api():
+        tabs = run_iterm_api(api_get_tabs)
+        if tabs is not API_UNAVAILABLE:
+            return tabs
+
     applescript = '''
 tell application "iTerm2"
     set tabInfo to {}
@@ -193,45 +617,60 @@ tell application "iTerm2"
             repeat with s in sessions of t
                 try
                     set sessionPath to variable named "session.path" in s
-                    set end of tabInfo to {windowId, sessionPath}
+                    set end of tabInfo to (windowId as string) & (character id 31) & sessionPath
                 end try
             end repeat
         end repeat
     end repeat
-    return tabInfo
+    set AppleScript's text item delimiters to linefeed
+    return tabInfo as text
 end tell
 '''
-    result = subprocess.run(
-        ["osascript", "-e", applescript],
-        capture_output=True,
-        text=True
-    )
+    result = run_osascript(applescript, stderr=subprocess.DEVNULL)
 
     if result.returncode != 0:
         return []
 
-    # Parse the output
+    # One "<window id>\x1f<path>" record per line; paths may contain commas
     tabs = []
-    output = result.stdout.strip()
-    if output:
-        # osascript returns nested lists as comma-separated values
-        parts = output.split(", ")
-        for i in range(0, len(parts), 2):
-            if i + 1 < len(parts):
-                try:
-                    window_id = int(parts[i])
-                    path = parts[i + 1]
-                    tabs.append({"window_id": window_id, "path": path})
-                except (ValueError, IndexError):
-                    continue
+    for line in result.stdout.split("\n"):
+        window_id, sep, path = line.partition("\x1f")
+        if sep:
+            tabs.append({"window_id": int(window_id), "path": path})
 
     return tabs
 
 
-def switch_to_tab(worktree_path):
-    """Switch to an iTerm2 tab running in the specified worktree."""
+def switch_to_tab(worktree_path, open_mode=None, run_claude=False, task_description=None):
+    """Switch to an iTerm2 tab running in the specified worktree.
+
+    If no tab is found and `open_mode` is given, a new session is opened in
+    the same API connection or osascript run. Returns True if an existing
+    tab was selected.
+    """
     normalized_path = os.path.normpath(worktree_path)
 
+    script_path = None
+    if open_mode:
+        script_path = write_session_script(worktree_path, run_claude, task_description)
+
+    if use_iterm_api():
+        command = f"source {shlex.quote(script_path)}" if script_path else None
+        found = run_iterm_api(api_switch_to_tab, normalized_path, open_mode, command)
+        if found is not API_UNAVAILABLE:
+            if found and script_path:
+                remove_session_script(script_path)
+            return found
+
+    if open_mode:
+        fallback = build_open_script(open_mode, build_session_command(script_path)) + '''    activate
+    return "opened"
+'''
+    else:
+        fallback = '''
+    return "not_found"
+'''
+
     applescript = f'''
 tell application "iTerm2"
     repeat with w in windows
@@ -239,7 +678,7 @@ tell application "iTerm2"
             repeat with s in sessions of t
                 try
                     set sessionPath to variable named "session.path" in s
-                    if sessionPath is equal to "{normalized_path}" then
+                    if sessionPath is equal to {quote_applescript(normalized_path)} then
                         select t
                         set frontmost of w to true
                         activate
@@ -248,55 +687,81 @@ tell application "iTerm2"
                 end try
             end repeat
         end repeat
-    end repeat
-    return "not_found"
-end tell
+    end repeat{fallback}end tell
 '''
 
-    result = subprocess.run(
-        ["osascript", "-e", applescript],
-        capture_output=True,
-        text=True
-    )
+    result = run_osascript(applescript)
 
-    return "found" in result.stdout
+    found = result.stdout.strip() == "found"
+    if script_path and (found or result.returncode != 0):
+        remove_session_script(script_path)
+    if open_mode and result.returncode != 0:
+        raise RuntimeError(f"iTerm2 automation failed: {result.stderr}")
 
+    return found
 
-def cmd_create(args):
-    """Create a new worktree with a feature branch."""
-    repo_root = get_repo_root()
-    branch_name = args.branch
 
-    # Determine base branch
+def add_worktree(branch_name, worktree_path, base_branch, no_track=False):
+    """Create a worktree on a new branch.
+
+    Returns None on success, or an error message. An existing branch is
+    only checked for after git fails, so the common case costs one call.
+    Git runs with LC_ALL=C so its message can be matched in any locale.
+    """
+    if os.path.exists(worktree_path):
+        return f"Path '{worktree_path}' already exists"
+
+    add_args = ["worktree", "add"]
+    if no_track:
+        add_args.append("--no-track")
+    add_args += ["-b", branch_name, worktree_path, base_branch]
+
+    result = run_git(*add_args, check=False, env=dict(os.environ, LC_ALL="C"))
+    if result.returncode != 0:
+        # `-b` creates the branch before checking out, so a later failure
+        # also leaves it behind; only git's own message tells them apart
+        if f"a branch named '{branch_name}' already exists" in result.stderr:
+            return f"Branch '{branch_name}' already exists"
+        return f"Git error: {result.stderr.strip()}"
+    return None
+
+
+def resolve_base_branch(args):
+    """Determine the base branch for create commands, or None if unknown."""
     if args.from_current:
-        base_branch = get_current_branch()
+        base_branch = gather_repo_info()["current_branch"]
         if not base_branch:
             print("Error: Could not determine current branch", file=sys.stderr)
-            return 1
+            return None
         print(f"Branching from current branch: {base_branch}")
-    else:
-        base_branch = args.base or get_default_branch()
+        return base_branch
+
+    return args.base or get_default_branch()
+
+
+def cmd_create(args):
+    """Create a new worktree with a feature branch."""
+    branch_name = args.branch
+
+    # Determine base branch
+    base_branch = resolve_base_branch(args)
+    if not base_branch:
+        return 1
 
     # Determine worktree path
     if args.path:
         worktree_path = os.path.abspath(args.path)
     else:
         # Create sibling directory with branch name
-        parent_dir = os.path.dirname(repo_root)
+        parent_dir = os.path.dirname(get_repo_root(known_root=args.repo_root))
         worktree_path = os.path.join(parent_dir, branch_name)
 
-    # Validate
-    if branch_exists(branch_name):
-        print(f"Error: Branch '{branch_name}' already exists", file=sys.stderr)
-        return 1
-
-    if os.path.exists(worktree_path):
-        print(f"Error: Path '{worktree_path}' already exists", file=sys.stderr)
-        return 1
-
     # Create the worktree with new branch
     print(f"Creating worktree at {worktree_path} with branch {branch_name}...")
-    run_git("worktree", "add", "-b", branch_name, worktree_path, base_branch)
+    error = add_worktree(branch_name, worktree_path, base_branch)
+    if error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
 
     # Open in iTerm2
     if not args.no_iterm:
@@ -312,35 +777,97 @@ def cmd_create(args):
     return 0
 
 
+def cmd_create_many(args):
+    """Create several worktrees in parallel, one per branch."""
+    branches = args.branches
+    if not branches and not sys.stdin.isatty():
+        branches = sys.stdin.read().split()
+    # Drop duplicates, keeping order
+    branches = list(dict.fromkeys(branches))
+    if not branches:
+        print("Error: No branch names given", file=sys.stderr)
+        return 1
+
+    base_branch = resolve_base_branch(args)
+    if not base_branch:
+        return 1
+    parent_dir = os.path.dirname(get_repo_root(known_root=args.repo_root))
+
+    # Serializes retries of adds that lost a race on a git lock file with
+    # each other; first attempts from other workers still run concurrently
+    retry_lock = threading.Lock()
+
+    def create_one(branch_name):
+        worktree_path = os.path.join(parent_dir, branch_name)
+        # --no-track keeps concurrent adds from contending on .git/config.lock
+        error = add_worktree(branch_name, worktree_path, base_branch, no_track=True)
+        # Only retry while the branch is still absent; once `-b` created it,
+        # a second attempt would just fail on the existing branch
+        if error and ".lock" in error and not os.path.exists(worktree_path):
+            branch_ref = run_git("rev-parse", "--verify", "--quiet", f"refs/heads/{branch_name}",
+                                 check=False, stderr=subprocess.DEVNULL)
+            if branch_ref.returncode != 0:
+                with retry_lock:
+                    error = add_worktree(branch_name, worktree_path, base_branch, no_track=True)
+        return worktree_path, error
+
+    print(f"Creating {len(branches)} worktrees from {base_branch} ({args.jobs} jobs)...")
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(create_one, branch): branch for branch in branches}
+        for future in as_completed(futures):
+            branch_name = futures[future]
+            try:
+                worktree_path, error = future.result()
+            except Exception as e:
+                error = str(e)
+            if error:
+                failed += 1
+                print(f"Error: {branch_name}: {error}", file=sys.stderr)
+                continue
+            print(f"  {branch_name}: {worktree_path}")
+            # Opened one at a time from this thread: the iTerm2 scripts act on
+            # the current window/session, so concurrent opens would race
+            if not args.no_iterm:
+                try:
+                    automate_iterm(worktree_path, open_mode=args.open_mode)
+                except Exception as e:
+                    # The worktree exists; only opening it failed
+                    print(f"Warning: {branch_name}: could not open in iTerm2: {e}", file=sys.stderr)
+
+    print(f"Created {len(branches) - failed} of {len(branches)} worktrees")
+    return 1 if failed else 0
+
+
 def cmd_close(args):
     """Close and remove a worktree."""
     worktrees = get_worktrees()
 
-    # Find the worktree
-    target = None
     search = args.worktree
-
-    for wt in worktrees:
-        if wt.get("branch") == search or wt.get("path") == search or wt.get("path", "").endswith(f"/{search}"):
-            target = wt
-            break
+    target = find_worktree(worktrees, search)
 
     if not target:
         print(f"Error: Worktree '{search}' not found", file=sys.stderr)
+        # Never remove a guessed worktree; only suggest it
+        closest = find_closest_worktree(worktrees, search)
+        if closest:
+            print(f"Did you mean '{closest['branch']}'?", file=sys.stderr)
         return 1
 
     worktree_path = target["path"]
     branch = target.get("branch")
 
+    dirty, ahead = get_worktree_state(worktree_path)
+
     # Check for uncommitted changes
-    if has_uncommitted_changes(worktree_path):
+    if dirty:
         if not args.force:
             print(f"Error: Worktree has uncommitted changes. Use --force to override.", file=sys.stderr)
             return 1
         print("Warning: Forcing removal despite uncommitted changes")
 
     # Check for unpushed commits
-    if has_unpushed_commits(worktree_path):
+    if ahead:
         if not args.force:
             print(f"Error: Worktree has unpushed commits. Use --force to override.", file=sys.stderr)
             return 1
@@ -348,12 +875,15 @@ def cmd_close(args):
 
     # Remove the worktree
     print(f"Removing worktree at {worktree_path}...")
-    run_git("worktree", "remove", worktree_path, "--force" if args.force else None)
+    remove_args = ["worktree", "remove", worktree_path]
+    if args.force:
+        remove_args.append("--force")
+    run_git(*remove_args)
 
     # Optionally delete the branch
     if args.delete_branch and branch:
         print(f"Deleting branch {branch}...")
-        run_git("branch", "-D" if args.force else "-d", branch, check=False)
+        run_git("branch", "-D" if args.force else "-d", branch, check=False, stderr=subprocess.DEVNULL)
 
     print("Worktree closed successfully")
     return 0
@@ -361,26 +891,49 @@ def cmd_close(args):
 
 def cmd_list(args):
     """List all active worktrees."""
-    worktrees = get_worktrees()
-    iterm_tabs = get_iterm_tabs() if not args.no_iterm else []
+    # The [iTerm] marker is for people; skip the osascript scan for JSON and
+    # piped output unless explicitly requested
+    check_iterm = args.with_iterm or (
+        not args.no_iterm and not args.json and sys.stdout.isatty()
+    )
 
-    # Create a set of paths that have iTerm tabs
-    tab_paths = {os.path.normpath(t["path"]) for t in iterm_tabs if "path" in t}
+    if not check_iterm:
+        worktrees = get_worktrees()
+        iterm_tabs = []
+    else:
+        # git and osascript are independent; run them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            worktrees_future = executor.submit(get_worktrees)
+            iterm_tabs_future = executor.submit(get_iterm_tabs)
+            worktrees = worktrees_future.result()
+            iterm_tabs = iterm_tabs_future.result()
+
+    # Create a set of paths that have iTerm tabs. git already prints worktree
+    # paths absolute and normalized, so only the session paths need normpath.
+    tab_paths = {os.path.normpath(t["path"]) for t in iterm_tabs}
+
+    if check_iterm:
+        for wt in worktrees:
+            wt["has_iterm_tab"] = wt.get("path") in tab_paths
 
     if args.json:
-        output = []
-        for wt in worktrees:
-            wt["has_iterm_tab"] = os.path.normpath(wt.get("path", "")) in tab_paths
-            output.append(wt)
-        print(json.dumps(output, indent=2))
+        output = worktrees
+        if args.fields:
+            fields = args.fields.split(",")
+            output = [{key: wt[key] for key in fields if key in wt} for wt in worktrees]
+        if args.indent is None:
+            text = json.dumps(output, separators=(",", ":"))
+        else:
+            text = json.dumps(output, indent=args.indent)
+        # ASCII-only JSON, so write bytes and skip the text layer
+        sys.stdout.buffer.write(text.encode() + b"\n")
     else:
         print("Active Worktrees:")
         print("-" * 60)
         for wt in worktrees:
             path = wt.get("path", "unknown")
             branch = wt.get("branch", "detached")
-            has_tab = os.path.normpath(path) in tab_paths
-            tab_indicator = " [iTerm]" if has_tab else ""
+            tab_indicator = " [iTerm]" if wt.get("has_iterm_tab") else ""
             print(f"  {branch}: {path}{tab_indicator}")
 
     return 0
@@ -390,14 +943,13 @@ def cmd_switch(args):
     """Switch to a worktree's iTerm2 tab."""
     worktrees = get_worktrees()
 
-    # Find the worktree
-    target = None
     search = args.worktree
+    target = find_worktree(worktrees, search)
 
-    for wt in worktrees:
-        if wt.get("branch") == search or wt.get("path") == search or wt.get("path", "").endswith(f"/{search}"):
-            target = wt
-            break
+    if not target:
+        target = find_closest_worktree(worktrees, search)
+        if target:
+            print(f"Using closest match: {target['branch']}")
 
     if not target:
         print(f"Error: Worktree '{search}' not found", file=sys.stderr)
@@ -405,27 +957,24 @@ def cmd_switch(args):
 
     worktree_path = target["path"]
 
-    if switch_to_tab(worktree_path):
+    if switch_to_tab(worktree_path, open_mode=args.open_mode):
         print(f"Switched to worktree: {target.get('branch', worktree_path)}")
-        return 0
     else:
-        print(f"No iTerm2 tab found for worktree. Opening new tab...")
-        automate_iterm(worktree_path, open_mode=args.open_mode)
-        return 0
+        print(f"No iTerm2 tab found for worktree. Opened new tab")
+    return 0
 
 
 def cmd_open(args):
     """Open an existing worktree in iTerm2."""
     worktrees = get_worktrees()
 
-    # Find the worktree
-    target = None
     search = args.worktree
+    target = find_worktree(worktrees, search)
 
-    for wt in worktrees:
-        if wt.get("branch") == search or wt.get("path") == search or wt.get("path", "").endswith(f"/{search}"):
-            target = wt
-            break
+    if not target:
+        target = find_closest_worktree(worktrees, search)
+        if target:
+            print(f"Using closest match: {target['branch']}")
 
     if not target:
         print(f"Error: Worktree '{search}' not found", file=sys.stderr)
@@ -433,22 +982,38 @@ def cmd_open(args):
 
     worktree_path = target["path"]
 
-    # Check if already open
-    if not args.force and switch_to_tab(worktree_path):
-        print(f"Worktree already open, switched to existing tab")
-        return 0
-
-    # Open new tab
-    automate_iterm(
+    if args.force:
+        automate_iterm(
+            worktree_path,
+            open_mode=args.open_mode,
+            run_claude=args.claude,
+            task_description=args.task
+        )
+    # Switch to an existing tab, or open a new one in the same osascript run
+    elif switch_to_tab(
         worktree_path,
         open_mode=args.open_mode,
         run_claude=args.claude,
         task_description=args.task
-    )
+    ):
+        print(f"Worktree already open, switched to existing tab")
+        return 0
+
     print(f"Opened worktree: {target.get('branch', worktree_path)}")
     return 0
 
 
+def positive_int(value):
+    """argparse type for options that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: '{value}'")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Git Worktree Manager with iTerm2 Integration"
@@ -462,6 +1027,8 @@ def main():
     create_parser.add_argument("--from-current", "-f", action="store_true",
                                help="Branch from current branch instead of main/master")
     create_parser.add_argument("--path", "-p", help="Custom path for worktree")
+    create_parser.add_argument("--repo-root", default=None,
+                               help="Repository root, if already known (default: $WTM_REPO_ROOT or git)")
     create_parser.add_argument("--open-mode", "-o",
                                choices=["new_tab", "new_window", "new_pane_right", "new_pane_below"],
                                default="new_tab", help="How to open in iTerm2")
@@ -470,6 +1037,25 @@ def main():
     create_parser.add_argument("--task", "-t", help="Task description for Claude")
     create_parser.set_defaults(func=cmd_create)
 
+    # Create-many command
+    create_many_parser = subparsers.add_parser("create-many",
+                                               help="Create several worktrees in parallel")
+    create_many_parser.add_argument("branches", nargs="*",
+                                    help="Names for the new branches (default: read from stdin)")
+    create_many_parser.add_argument("--base", "-b", help="Base branch (default: main/master)")
+    create_many_parser.add_argument("--from-current", "-f", action="store_true",
+                                    help="Branch from current branch instead of main/master")
+    create_many_parser.add_argument("--repo-root", default=None,
+                                    help="Repository root, if already known (default: $WTM_REPO_ROOT or git)")
+    create_many_parser.add_argument("--jobs", "-J", type=positive_int,
+                                    default=min(max((os.cpu_count() or 1) * 3 // 4, 1), 8),
+                                    help="Worktrees to create at once (default: 3/4 of CPUs, max 8)")
+    create_many_parser.add_argument("--open-mode", "-o",
+                                    choices=["new_tab", "new_window", "new_pane_right", "new_pane_below"],
+                                    default="new_tab", help="How to open in iTerm2")
+    create_many_parser.add_argument("--no-iterm", action="store_true", help="Don't open in iTerm2")
+    create_many_parser.set_defaults(func=cmd_create_many)
+
     # Close command
     close_parser = subparsers.add_parser("close", help="Close and remove a worktree")
     close_parser.add_argument("worktree", help="Branch name or path of worktree")
@@ -480,7 +1066,13 @@ def main():
     # List command
     list_parser = subparsers.add_parser("list", help="List active worktrees")
     list_parser.add_argument("--json", "-j", action="store_true", help="Output as JSON")
-    list_parser.add_argument("--no-iterm", action="store_true", help="Don't check iTerm2 tabs")
+    list_parser.add_argument("--indent", type=int, default=None,
+                             help="Pretty-print JSON with this indent (default: compact)")
+    list_parser.add_argument("--fields", help="Comma-separated JSON keys to include (e.g. branch,path)")
+    list_iterm_group = list_parser.add_mutually_exclusive_group()
+    list_iterm_group.add_argument("--no-iterm", action="store_true", help="Don't check iTerm2 tabs")
+    list_iterm_group.add_argument("--with-iterm", action="store_true",
+                                  help="Check iTerm2 tabs even for JSON or non-terminal output")
     list_parser.set_defaults(func=cmd_list)
 
     # Switch command